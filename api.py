@@ -0,0 +1,378 @@
+"""Read-only JSON API over the shared travel data store.
+
+Serves the JSON file that app.py publishes on every edit. Responses carry
+an ETag derived from the store version and request, so unchanged polls get
+a 304 without rebuilding the body; list endpoints are cursor-paginated and
+bodies are gzip-compressed when the client accepts it.
+
+Usage:
+    python api.py --store travel_store.json --port 8502
+
+Endpoints:
+    GET /api/travel?start=YYYY-MM-DD&end=YYYY-MM-DD&limit=100&cursor=...
+    GET /api/members?limit=100&cursor=...
+    GET /api/stats/weekly?week=YYYY-MM-DD
+    GET /api/stats/monthly?month=YYYY-MM
+    GET /api/approvals/pending?limit=100&cursor=...
+"""
+import argparse
+import base64
+import bisect
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import namedtuple
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+GZIP_MIN_BYTES = 512
+
+
+class ApiError(Exception):
+    """Error reported to the client as a JSON body"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# One load of the store file; never modified, so handlers can read it without a lock
+StoreSnapshot = namedtuple('StoreSnapshot', 'version team_members records record_keys pending pending_keys')
+
+
+class TravelStore:
+    """The data store file, reloaded into a new snapshot when the file changes"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stamp = None
+        self.snapshot = StoreSnapshot('empty', [], [], [], [], [])
+
+    def refresh(self):
+        """Current snapshot, reloading the file if its size or modification time changed"""
+        try:
+            stat = os.stat(self.path)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stamp = None
+
+        with self._lock:
+            if stamp == self._stamp:
+                return self.snapshot
+            data = {}
+            if stamp is not None:
+                try:
+                    with open(self.path, encoding='utf-8') as f:
+                        data = json.load(f)
+                except (OSError, ValueError):
+                    # Keep serving the previous snapshot if the file is mid-write or unreadable
+                    return self.snapshot
+            # Swapped in with one assignment, so no reader pairs new records with old keys
+            self.snapshot = self._load(data, f"{stamp[0]}-{stamp[1]}" if stamp else 'empty')
+            self._stamp = stamp
+            return self.snapshot
+
+    @staticmethod
+    def _load(data, version):
+        travel_data = data.get('travel_data', {})
+        pending_keys = set(data.get('approvals_pending', []))
+
+        records = []
+        pending = []
+        for key, value in travel_data.items():
+            status = value.get('status')
+            if status not in ('business', 'vacation'):
+                continue
+            name, date = key.rsplit('_', 1)
+            record = {
+                'name': name,
+                'date': date,
+                'status': status,
+                'cost': value.get('daily_cost', 500) if status == 'business' else 0,
+                'approved': value.get('approved', True)
+            }
+            records.append(record)
+            if status == 'business' and not record['approved'] and key in pending_keys:
+                pending.append(record)
+
+        records.sort(key=lambda r: (r['date'], r['name']))
+        pending.sort(key=lambda r: (r['date'], r['name']))
+
+        return StoreSnapshot(
+            version=version,
+            team_members=data.get('team_members', []),
+            records=records,
+            record_keys=[(r['date'], r['name']) for r in records],
+            pending=pending,
+            pending_keys=[(r['date'], r['name']) for r in pending]
+        )
+
+
+def encode_cursor(sort_key):
+    raw = json.dumps(list(sort_key)).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor, key_length):
+    """Sort key from a cursor; anything but a list of key_length strings is rejected"""
+    try:
+        sort_key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ApiError(400, "Invalid cursor")
+    if (not isinstance(sort_key, list) or len(sort_key) != key_length
+            or not all(isinstance(part, str) for part in sort_key)):
+        raise ApiError(400, "Invalid cursor")
+    return tuple(sort_key)
+
+
+def paginate(items, keys, key_length, params, lo=0, hi=None):
+    """Slice items[lo:hi] (sorted by keys, tuples of key_length strings) after the cursor"""
+    hi = len(items) if hi is None else hi
+    limit = parse_int(params, 'limit', DEFAULT_LIMIT)
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ApiError(400, f"limit must be between 1 and {MAX_LIMIT}")
+
+    start = lo
+    if params.get('cursor'):
+        start = max(lo, bisect.bisect_right(keys, decode_cursor(params['cursor'], key_length), lo, hi))
+
+    page = items[start:min(start + limit, hi)]
+    next_cursor = None
+    if start + limit < hi and page:
+        next_cursor = encode_cursor(keys[start + len(page) - 1])
+    return {'items': page, 'next_cursor': next_cursor}
+
+
+def parse_int(params, name, default):
+    try:
+        return int(params.get(name, default))
+    except ValueError:
+        raise ApiError(400, f"{name} must be an integer")
+
+
+def parse_date(value, name):
+    try:
+        return datetime.date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"{name} must be a YYYY-MM-DD date")
+
+
+def travel_endpoint(snapshot, params):
+    """Business travel and vacation days in a date range"""
+    lo, hi = 0, len(snapshot.records)
+    if params.get('start'):
+        start = parse_date(params['start'], 'start').isoformat()
+        lo = bisect.bisect_left(snapshot.record_keys, (start,))
+    if params.get('end'):
+        end = parse_date(params['end'], 'end').isoformat()
+        hi = bisect.bisect_left(snapshot.record_keys, (end + '\uffff',))
+    return paginate(snapshot.records, snapshot.record_keys, 2, params, lo, max(lo, hi))
+
+
+def members_endpoint(snapshot, params):
+    """Per-member travel summaries"""
+    summaries = {m['name']: {
+        'name': m['name'],
+        'role': m.get('role', ''),
+        'business_days': 0,
+        'vacation_days': 0,
+        'pending_days': 0,
+        'total_cost': 0
+    } for m in snapshot.team_members}
+
+    for record in snapshot.records:
+        summary = summaries.get(record['name'])
+        if summary is None:
+            continue
+        if record['status'] == 'vacation':
+            summary['vacation_days'] += 1
+        elif record['approved']:
+            summary['business_days'] += 1
+            summary['total_cost'] += record['cost']
+        else:
+            summary['pending_days'] += 1
+
+    items = sorted(summaries.values(), key=lambda s: s['name'])
+    return paginate(items, [(s['name'],) for s in items], 1, params)
+
+
+def _range_stats(snapshot, first, last):
+    """Aggregate travel between two dates (inclusive)"""
+    lo = bisect.bisect_left(snapshot.record_keys, (first.isoformat(),))
+    hi = bisect.bisect_left(snapshot.record_keys, (last.isoformat() + '\uffff',))
+    members = {m['name'] for m in snapshot.team_members}
+
+    business_days = 0
+    vacation_days = 0
+    pending_approvals = 0
+    cost = 0
+    travelers = set()
+    for record in snapshot.records[lo:hi]:
+        if record['name'] not in members:
+            continue
+        if datetime.date.fromisoformat(record['date']).weekday() >= 5:
+            continue
+        if record['status'] == 'vacation':
+            vacation_days += 1
+        elif record['approved']:
+            business_days += 1
+            cost += record['cost']
+            travelers.add(record['name'])
+        else:
+            pending_approvals += 1
+
+    return {
+        'start': first.isoformat(),
+        'end': last.isoformat(),
+        'business_days': business_days,
+        'vacation_days': vacation_days,
+        'business_travelers': len(travelers),
+        'cost': cost,
+        'pending_approvals': pending_approvals
+    }
+
+
+def weekly_stats_endpoint(snapshot, params):
+    """Totals for the Monday-Friday week containing ?week="""
+    date = parse_date(params['week'], 'week') if params.get('week') else datetime.date.today()
+    monday = date - timedelta(days=date.weekday())
+    return _range_stats(snapshot, monday, monday + timedelta(days=4))
+
+
+def monthly_stats_endpoint(snapshot, params):
+    """Totals for the month given as ?month=YYYY-MM"""
+    if params.get('month'):
+        month_start = parse_date(params['month'] + '-01', 'month')
+    else:
+        month_start = datetime.date.today().replace(day=1)
+    month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return _range_stats(snapshot, month_start, month_end)
+
+
+def pending_endpoint(snapshot, params):
+    """Business travel waiting for manager approval"""
+    return paginate(snapshot.pending, snapshot.pending_keys, 2, params)
+
+
+ROUTES = {
+    '/api/travel': travel_endpoint,
+    '/api/members': members_endpoint,
+    '/api/stats/weekly': weekly_stats_endpoint,
+    '/api/stats/monthly': monthly_stats_endpoint,
+    '/api/approvals/pending': pending_endpoint,
+}
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """GET-only handler; the store is attached to the server"""
+
+    server_version = "OCMTravelAPI/1.0"
+
+    def do_GET(self):
+        self._handle(send_body=True)
+
+    def do_HEAD(self):
+        self._handle(send_body=False)
+
+    def do_POST(self):
+        self._send_json(405, {'error': 'Read-only API'}, extra_headers={'Allow': 'GET, HEAD'})
+
+    do_PUT = do_PATCH = do_DELETE = do_POST
+
+    def _handle(self, send_body):
+        url = urlsplit(self.path)
+        route = ROUTES.get(url.path.rstrip('/'))
+        if route is None:
+            self._send_json(404, {'error': 'Not found'}, send_body=send_body)
+            return
+
+        snapshot = self.server.store.refresh()
+        # Weak: the gzip and identity bodies of one version are equivalent, not byte-identical
+        etag = 'W/"' + hashlib.sha1(f"{snapshot.version}|{self.path}".encode('utf-8')).hexdigest() + '"'
+        # If-None-Match uses the weak comparison, so a W/ prefix on either side is ignored
+        client_tags = [t.strip().removeprefix('W/') for t in self.headers.get('If-None-Match', '').split(',')]
+        if etag.removeprefix('W/') in client_tags or '*' in client_tags:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            return
+
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            payload = route(snapshot, params)
+        except ApiError as e:
+            self._send_json(e.status, {'error': e.message}, send_body=send_body)
+            return
+        self._send_json(200, payload, send_body=send_body, extra_headers={
+            'ETag': etag,
+            'Cache-Control': 'no-cache'
+        })
+
+    def _send_json(self, status, payload, send_body=True, extra_headers=None):
+        body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        gzipped = len(body) >= GZIP_MIN_BYTES and 'gzip' in self.headers.get('Accept-Encoding', '')
+        if gzipped:
+            body = gzip.compress(body)
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Vary', 'Accept-Encoding')
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Polling clients would flood the Streamlit log otherwise
+        pass
+
+
+def create_server(store_path, host='127.0.0.1', port=8502):
+    """Create (but do not start) the API server"""
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    server.daemon_threads = True
+    server.store = TravelStore(store_path)
+    return server
+
+
+def start_server_thread(store_path, host='127.0.0.1', port=8502):
+    """Serve the API from a daemon thread and return the server"""
+    server = create_server(store_path, host, port)
+    thread = threading.Thread(target=server.serve_forever, name="ocm-travel-api", daemon=True)
+    thread.start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Read-only JSON API for the OCM Travel Tracker")
+    parser.add_argument("--store", default=os.environ.get('OCM_DATA_STORE', 'travel_store.json'),
+                        help="path of the JSON data store written by app.py")
+    parser.add_argument("--host", default='127.0.0.1')
+    parser.add_argument("--port", type=int, default=8502)
+    args = parser.parse_args(argv)
+
+    server = create_server(args.store, args.host, args.port)
+    print(f"Serving {args.store} on http://{args.host}:{args.port}/api/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,24 @@
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 import pandas as pd
 import datetime
 from datetime import timedelta
 import json
 import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
 from io import BytesIO
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
 import requests
+import api
+from approval_policy import decide_requests
+from data_store import TravelDataStore, is_office
+from notifications import NotificationOutbox, deliver_email
 
 # Page config
 st.set_page_config(
@@ -126,12 +131,38 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
-# Initialize session state
-if 'travel_data' not in st.session_state:
-    st.session_state.travel_data = {}
+# Shared data store: one per server process, published for api.py on every edit
+DATA_STORE_PATH = os.environ.get('OCM_DATA_STORE', 'travel_store.json')
+
+DEFAULT_TEAM = [
+    {"name": "Torsten Gadfelt", "role": "Manager (MD)", "email": "torsten.gadfelt@fedex.com", "is_manager": True},
+    {"name": "Niels Woersaa", "role": "Senior OCM Analyst", "email": "niels.woersaa@fedex.com", "is_manager": False},
+    {"name": "Billie Hoey", "role": "Senior OCM Analyst", "email": "billie.hoey@fedex.com", "is_manager": False},
+    {"name": "Tommi Sjcholm", "role": "OCM PMO", "email": "tommi.sjcholm@fedex.com", "is_manager": False},
+    {"name": "Tomi Ruippo", "role": "OCM Advisor", "email": "tomi.ruippo@fedex.com", "is_manager": False},
+    {"name": "Annalisa Giotta", "role": "OCM Advisor", "email": "annalisa.giotta@fedex.com", "is_manager": False},
+    {"name": "Jesse Hupkens", "role": "OCM Advisor", "email": "jesse.hupkens@fedex.com", "is_manager": False}
+]
+
+@st.cache_resource
+def get_data_store(path):
+    """The store every session reads and writes; tombstones are compacted in the background"""
+    store = TravelDataStore(path, DEFAULT_TEAM)
+    store.start_compaction()
+    return store
+
+data_store = get_data_store(DATA_STORE_PATH)
 
-if 'approvals_pending' not in st.session_state:
-    st.session_state.approvals_pending = []
+def refresh_shared_data():
+    """Point this session at the store's current (read-only) snapshot"""
+    snapshot = data_store.snapshot()
+    st.session_state.travel_data = snapshot['travel_data']
+    st.session_state.approvals_pending = snapshot['approvals_pending']
+    st.session_state.team_members = snapshot['team_members']
+    st.session_state.data_version = snapshot['version']
+
+# Initialize session state
+refresh_shared_data()
 
 if 'email_config' not in st.session_state:
     st.session_state.email_config = {
@@ -139,7 +170,10 @@ if 'email_config' not in st.session_state:
         'smtp_port': 587,
         'sender_email': '',
         'sender_password': '',
-        'notification_enabled': False
+        'notification_enabled': False,
+        'send_delay_seconds': 30,
+        'digest_window_seconds': 300,
+        'digest_max_items': 25
     }
 
 if 'budget_data' not in st.session_state:
@@ -149,17 +183,6 @@ if 'budget_data' not in st.session_state:
         'requires_approval_above': 1000
     }
 
-if 'team_members' not in st.session_state:
-    st.session_state.team_members = [
-        {"name": "Torsten Gadfelt", "role": "Manager (MD)", "email": "torsten.gadfelt@fedex.com", "is_manager": True},
-        {"name": "Niels Woersaa", "role": "Senior OCM Analyst", "email": "niels.woersaa@fedex.com", "is_manager": False},
-        {"name": "Billie Hoey", "role": "Senior OCM Analyst", "email": "billie.hoey@fedex.com", "is_manager": False},
-        {"name": "Tommi Sjcholm", "role": "OCM PMO", "email": "tommi.sjcholm@fedex.com", "is_manager": False},
-        {"name": "Tomi Ruippo", "role": "OCM Advisor", "email": "tomi.ruippo@fedex.com", "is_manager": False},
-        {"name": "Annalisa Giotta", "role": "OCM Advisor", "email": "annalisa.giotta@fedex.com", "is_manager": False},
-        {"name": "Jesse Hupkens", "role": "OCM Advisor", "email": "jesse.hupkens@fedex.com", "is_manager": False}
-    ]
-
 if 'automated_reports' not in st.session_state:
     st.session_state.automated_reports = {
         'weekly_report': True,
@@ -167,39 +190,73 @@ if 'automated_reports' not in st.session_state:
         'report_recipients': ['torsten.gadfelt@fedex.com']
     }
 
+# Expensive panels are cached against data_version (the store version last seen)
+if 'view_cache' not in st.session_state:
+    st.session_state.view_cache = {}
+
+# Auto-approval rules; caps are the highest daily cost approved without a manager.
+# Shared like the store, so every session decides requests by the same rules.
+@st.cache_resource
+def get_approval_policy():
+    """The rules every session applies, changed in place by the rules form"""
+    return {
+        'enabled': False,
+        'role_caps': {},
+        'member_caps': {},
+        'monthly_budget': 0,  # 0 = annual_budget / 12
+        'annual_budget': st.session_state.budget_data['annual_budget'],
+        'blackout_dates': []
+    }
+
+approval_policy = get_approval_policy()
+
+# Undo/redo history of calendar edits
+if 'undo_settings' not in st.session_state:
+    st.session_state.undo_settings = {
+        'max_depth': 50
+    }
+
+if 'undo_stack' not in st.session_state:
+    st.session_state.undo_stack = deque(maxlen=st.session_state.undo_settings['max_depth'])
+    st.session_state.redo_stack = deque(maxlen=st.session_state.undo_settings['max_depth'])
+    st.session_state.current_edit = None
+
+# Notifications wait until their undo window has passed, in an outbox that
+# outlives the session so closing the tab never drops mail
+@st.cache_resource
+def get_notification_outbox():
+    """The outbox every session queues into, flushed by its own thread"""
+    outbox = NotificationOutbox()
+    outbox.start()
+    return outbox
+
+notification_outbox = get_notification_outbox()
+
 # Email functions
 def send_email_notification(to_email, subject, body, attachment=None):
     """Send email notifications"""
-    if not st.session_state.email_config['notification_enabled']:
-        return False
-    
     try:
-        msg = MIMEMultipart()
-        msg['From'] = st.session_state.email_config['sender_email']
-        msg['To'] = to_email
-        msg['Subject'] = subject
-        
-        msg.attach(MIMEText(body, 'html'))
-        
-        if attachment:
-            part = MIMEBase('application', 'octet-stream')
-            part.set_payload(attachment.read())
-            encoders.encode_base64(part)
-            part.add_header('Content-Disposition', f'attachment; filename="travel_report.xlsx"')
-            msg.attach(part)
-        
-        # Uncomment when email is configured
-        # server = smtplib.SMTP(st.session_state.email_config['smtp_server'], st.session_state.email_config['smtp_port'])
-        # server.starttls()
-        # server.login(st.session_state.email_config['sender_email'], st.session_state.email_config['sender_password'])
-        # server.send_message(msg)
-        # server.quit()
-        
-        return True
+        return deliver_email(st.session_state.email_config, to_email, subject, body, attachment)
     except Exception as e:
         st.error(f"Email error: {str(e)}")
         return False
 
+def queue_notification(to_email, subject, body, digest_item=None):
+    """Queue an email to go out after the undo window; returns its id
+    
+    digest_item ({'kind', 'member', 'date', 'cost'}) lets the email be merged
+    with others to the same recipient into one digest.
+    """
+    notification_id = notification_outbox.queue(st.session_state.email_config, to_email, subject, body,
+                                                 digest_item)
+    if st.session_state.current_edit is not None:
+        st.session_state.current_edit['notifications'].append(notification_id)
+    return notification_id
+
+def cancel_notifications(notification_ids):
+    """Remove unsent notifications from the outbox and return them"""
+    return notification_outbox.cancel(notification_ids)
+
 def send_approval_request(member_name, dates, cost):
     """Send approval request to manager"""
     manager = next((m for m in st.session_state.team_members if m['is_manager']), None)
@@ -221,7 +278,12 @@ def send_approval_request(member_name, dates, cost):
     </html>
     """
     
-    send_email_notification(manager['email'], subject, body)
+    queue_notification(manager['email'], subject, body, digest_item={
+        'kind': 'approval_request',
+        'member': member_name,
+        'date': dates,
+        'cost': cost
+    })
 
 def send_calendar_invite(member_email, dates, travel_type):
     """Create calendar invite for Outlook"""
@@ -252,6 +314,197 @@ def get_week_range(date):
     friday = monday + timedelta(days=4)
     return f"{monday.strftime('%B %d')} - {friday.strftime('%B %d, %Y')}"
 
+def mark_data_changed():
+    """Publish the store (in the background) and move this session to the new version"""
+    data_store.save()
+    refresh_shared_data()
+
+def rerun_fragment():
+    """Rerun just the calling fragment, or the whole app if this run was a full one
+    
+    A click is usually handled in a rerun of its own fragment, but Streamlit
+    can fold it into a full rerun, where scope="fragment" is refused.
+    """
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+def cached_by_version(name, compute, *inputs):
+    """Return compute(), recomputed only when the data version or inputs change"""
+    token = (st.session_state.data_version,) + inputs
+    entry = st.session_state.view_cache.get(name)
+    if entry is None or entry[0] != token:
+        entry = (token, compute())
+        st.session_state.view_cache[name] = entry
+    return entry[1]
+
+# Calendar edits - every write goes through set_cell so it can be undone.
+# Writes go straight to the shared store; this session's snapshot catches
+# up when the edit ends, so reads inside an edit use data_store.get().
+def set_cell(key, value):
+    """Write a cell as part of the current edit"""
+    before = data_store.write(key, value)
+    # Office is recorded as None so deltas survive compaction of the cell
+    st.session_state.current_edit['deltas'].append((key, before, None if is_office(value) else value))
+
+@contextmanager
+def edit_batch(label):
+    """Group cell writes and notifications into one undoable edit"""
+    edit = {'label': label, 'deltas': [], 'notifications': [], 'cancelled': []}
+    st.session_state.current_edit = edit
+    try:
+        yield edit
+    finally:
+        st.session_state.current_edit = None
+    if edit['deltas']:
+        st.session_state.undo_stack.append(edit)
+        st.session_state.redo_stack.clear()
+        mark_data_changed()
+
+def net_changes(deltas):
+    """First 'before' and last 'after' of every cell an edit touched"""
+    net = {}
+    for key, before, after in deltas:
+        net[key] = (net[key][0] if key in net else before, after)
+    return net
+
+def report_conflicts(action, edit, conflicts):
+    """Tell the user (after the rerun) which cells were left alone"""
+    if conflicts:
+        cells = ", ".join(" ".join(k.rsplit('_', 1)) for k in conflicts[:5])
+        more = f" and {len(conflicts) - 5} more" if len(conflicts) > 5 else ""
+        st.session_state.edit_notice = (f"{action} of {edit['label']} left {cells}{more} alone: "
+                                        f"changed in another session since")
+
+def undo_last_edit():
+    """Revert the most recent edit and cancel its unsent notifications
+    
+    Cells someone else has changed since are left as they are.
+    """
+    if not st.session_state.undo_stack:
+        return None
+    edit = st.session_state.undo_stack.pop()
+    net = net_changes(edit['deltas'])
+    conflicts = data_store.apply([(k, before) for k, (before, after) in net.items()],
+                                 expect={k: after for k, (before, after) in net.items()})
+    report_conflicts("Undo", edit, conflicts)
+    edit['cancelled'] = cancel_notifications(edit['notifications'])
+    edit['notifications'] = []
+    st.session_state.redo_stack.append(edit)
+    mark_data_changed()
+    return edit
+
+def redo_last_edit():
+    """Re-apply the most recently undone edit"""
+    if not st.session_state.redo_stack:
+        return None
+    edit = st.session_state.redo_stack.pop()
+    net = net_changes(edit['deltas'])
+    conflicts = data_store.apply([(k, after) for k, (before, after) in net.items()],
+                                 expect={k: before for k, (before, after) in net.items()})
+    report_conflicts("Redo", edit, conflicts)
+    # Notifications cancelled by the undo go back into the outbox
+    st.session_state.current_edit = edit
+    for notification in edit['cancelled']:
+        queue_notification(notification['to'], notification['subject'], notification['body'],
+                           notification.get('digest_item'))
+    st.session_state.current_edit = None
+    edit['cancelled'] = []
+    st.session_state.undo_stack.append(edit)
+    mark_data_changed()
+    return edit
+
+def set_undo_depth(depth):
+    """Resize the undo/redo history, keeping the most recent edits"""
+    st.session_state.undo_settings['max_depth'] = depth
+    st.session_state.undo_stack = deque(st.session_state.undo_stack, maxlen=depth)
+    st.session_state.redo_stack = deque(st.session_state.redo_stack, maxlen=depth)
+
+# Auto-approval policy
+def compile_approval_policy():
+    """Turn the rules into arrays, recompiled only when rules or team change"""
+    policy = approval_policy
+    members = st.session_state.team_members
+    token = (json.dumps(policy, sort_keys=True), tuple((m['name'], m['role']) for m in members))
+    entry = st.session_state.view_cache.get('compiled_policy')
+    if entry is not None and entry[0] == token:
+        return entry[1]
+    
+    # Member cap beats role cap; -1 means never auto-approve. The extra
+    # trailing -1 is what unknown members (index -1) pick up.
+    caps = np.full(len(members) + 1, -1.0)
+    for i, member in enumerate(members):
+        cap = policy['member_caps'].get(member['name'], policy['role_caps'].get(member['role']))
+        if cap is not None:
+            caps[i] = cap
+    
+    compiled = {
+        'member_index': {m['name']: i for i, m in enumerate(members)},
+        'caps': caps,
+        'blackout': np.array(sorted(policy['blackout_dates']), dtype='datetime64[D]'),
+        'monthly_budget': policy['monthly_budget'] or policy['annual_budget'] / 12
+    }
+    st.session_state.view_cache['compiled_policy'] = (token, compiled)
+    return compiled
+
+def calculate_monthly_spend():
+    """Approved business travel cost per 'YYYY-MM'"""
+    spend = {}
+    for key, value in st.session_state.travel_data.items():
+        if value.get('status') == 'business' and value.get('approved', True):
+            month = key[-10:-3]
+            spend[month] = spend.get(month, 0) + value.get('daily_cost', 0)
+    return spend
+
+def evaluate_approval_policy(keys=None):
+    """Decide pending requests in one vectorized pass; returns (approve, reject) keys"""
+    compiled = compile_approval_policy()
+    if keys is None:
+        keys = data_store.snapshot()['approvals_pending']
+    cells = {k: data_store.get(k) for k in keys}
+    keys = [k for k in keys if cells[k] is not None]
+    if not keys:
+        return [], []
+    
+    names, dates = zip(*(k.rsplit('_', 1) for k in keys))
+    member_idx = np.array([compiled['member_index'].get(n, -1) for n in names])
+    dates = np.array(dates, dtype='datetime64[D]')
+    costs = np.array([cells[k].get('daily_cost', 500) for k in keys], dtype=float)
+    
+    approve, reject = decide_requests(member_idx, dates, costs, compiled['caps'], compiled['blackout'],
+                                      compiled['monthly_budget'],
+                                      cached_by_version('monthly_spend', calculate_monthly_spend))
+    return [k for k, a in zip(keys, approve) if a], [k for k, r in zip(keys, reject) if r]
+
+def run_approval_policy(keys=None):
+    """Apply the rules to pending requests inside the current edit"""
+    if not approval_policy['enabled']:
+        return 0, 0
+    approve, reject = evaluate_approval_policy(keys)
+    emails = {m['name']: m['email'] for m in st.session_state.team_members}
+    
+    for key in approve:
+        cell = data_store.get(key)
+        cost = cell.get('daily_cost', 500)
+        set_cell(key, {**cell, 'approved': True})
+        name, date = key.rsplit('_', 1)
+        if name in emails:
+            queue_notification(emails[name], "Travel Approved",
+                               f"Your travel request for {date} has been approved automatically.",
+                               {'kind': 'approved', 'member': name, 'date': date, 'cost': cost})
+    
+    for key in reject:
+        cost = data_store.get(key).get('daily_cost', 500)
+        set_cell(key, {'status': 'office'})
+        name, date = key.rsplit('_', 1)
+        if name in emails:
+            queue_notification(emails[name], "Travel Rejected",
+                               f"Your travel request for {date} falls on a blackout date and was rejected.",
+                               {'kind': 'rejected', 'member': name, 'date': date, 'cost': cost})
+    
+    return len(approve), len(reject)
+
 def cycle_status(current_data):
     """Cycle: Office → Business Travel → Vacation → Office"""
     if not current_data or current_data.get('status') == 'office':
@@ -263,6 +516,10 @@ def cycle_status(current_data):
 
 def calculate_weekly_stats(week_start):
     """Calculate statistics for the current week"""
+    return compute_weekly_stats(week_start, st.session_state.travel_data, st.session_state.team_members)
+
+def compute_weekly_stats(week_start, travel_data, team_members):
+    """Weekly and monthly statistics from the given data (safe off the script thread)"""
     week_dates = get_week_dates(week_start)
     business_days = 0
     vacation_days = 0
@@ -270,12 +527,12 @@ def calculate_weekly_stats(week_start):
     week_cost = 0
     pending_approvals = 0
     
-    for member in st.session_state.team_members:
+    for member in team_members:
         has_business_travel = False
         for date in week_dates:
             date_str = date.strftime('%Y-%m-%d')
             key = f"{member['name']}_{date_str}"
-            data = st.session_state.travel_data.get(key, {})
+            data = travel_data.get(key, {})
             
             if data.get('status') == 'business':
                 if data.get('approved', True):
@@ -299,10 +556,10 @@ def calculate_weekly_stats(week_start):
     current = month_start
     while current <= month_end:
         if current.weekday() < 5:
-            for member in st.session_state.team_members:
+            for member in team_members:
                 date_str = current.strftime('%Y-%m-%d')
                 key = f"{member['name']}_{date_str}"
-                data = st.session_state.travel_data.get(key, {})
+                data = travel_data.get(key, {})
                 if data.get('status') == 'business' and data.get('approved', True):
                     month_business_days += 1
                     month_cost += data.get('daily_cost', 500)
@@ -318,6 +575,137 @@ def calculate_weekly_stats(week_start):
         'pending_approvals': pending_approvals
     }
 
+# Week view-models: cell icons, button types and stats, prefetched for adjacent weeks
+WEEK_VIEW_CACHE_SIZE = 16
+PREFETCH_WEEKS = 1
+
+def build_week_view(week_start, travel_data, team_members, approval_threshold):
+    """Precompute the calendar cells and stats for one week"""
+    date_strs = [date.strftime('%Y-%m-%d') for date in get_week_dates(week_start)]
+    rows = []
+    for member in team_members:
+        cells = []
+        for date_str in date_strs:
+            key = f"{member['name']}_{date_str}"
+            data = travel_data.get(key, {'status': 'office'})
+            status = data.get('status', 'office')
+            
+            if status == 'business':
+                cost = data.get('daily_cost', 500)
+                needs_approval = (cost > approval_threshold and not member.get('is_manager')
+                                  and not data.get('approved', False))
+                cells.append((key, "⏳" if needs_approval else "✈️", "primary"))
+            elif status == 'vacation':
+                cells.append((key, "🏖️", "secondary"))
+            else:
+                cells.append((key, "🏢", "secondary"))
+        rows.append(cells)
+    
+    return {
+        'rows': rows,
+        'stats': compute_weekly_stats(week_start, travel_data, team_members)
+    }
+
+class WeekViewCache:
+    """Per-session LRU of week view-models keyed by (Monday, data version, approval threshold)"""
+    
+    def __init__(self, max_entries=WEEK_VIEW_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.waits = 0
+        self.misses = 0
+        self.prefetched = 0
+    
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries or key in self._pending
+    
+    def get(self, key, build):
+        """Return the cached view, waiting on an in-flight prefetch, else build it now"""
+        with self._lock:
+            view = self._entries.get(key)
+            if view is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return view
+            future = self._pending.get(key)
+        
+        if future is not None:
+            try:
+                view = future.result()
+                with self._lock:
+                    self.waits += 1
+                return view
+            except Exception:
+                pass
+        
+        view = build()
+        with self._lock:
+            self.misses += 1
+            self._store(key, view)
+        return view
+    
+    def prefetch(self, executor, key, build):
+        """Build a view on the executor unless it is cached or already queued"""
+        with self._lock:
+            if key in self._entries or key in self._pending:
+                return
+            future = executor.submit(build)
+            self._pending[key] = future
+        future.add_done_callback(partial(self._finish_prefetch, key))
+    
+    def _finish_prefetch(self, key, future):
+        with self._lock:
+            self._pending.pop(key, None)
+            if future.exception() is None:
+                self._store(key, future.result())
+                self.prefetched += 1
+    
+    def _store(self, key, view):
+        self._entries[key] = view
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def hit_rate(self):
+        """Share of lookups served without waiting; a wait on an in-flight prefetch is not a hit"""
+        total = self.hits + self.waits + self.misses
+        return self.hits / total if total else 0.0
+
+@st.cache_resource
+def get_prefetch_executor():
+    """Worker threads shared by all sessions for week prefetching"""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="week-prefetch")
+
+def get_week_view(week):
+    """View-model for the week of `week`, prefetching its neighbours in the background"""
+    if 'week_view_cache' not in st.session_state:
+        st.session_state.week_view_cache = WeekViewCache()
+    cache = st.session_state.week_view_cache
+    # Keyed by Monday so every day of a week (Today, Prev/Next, a heatmap click) shares one entry
+    monday = get_week_dates(week)[0]
+    version = st.session_state.data_version
+    threshold = st.session_state.budget_data['requires_approval_above']
+    travel_data = st.session_state.travel_data
+    team_members = st.session_state.team_members
+    
+    view = cache.get((monday, version, threshold),
+                     lambda: build_week_view(monday, travel_data, team_members, threshold))
+    
+    neighbours = [monday + timedelta(weeks=offset)
+                  for offset in range(-PREFETCH_WEEKS, PREFETCH_WEEKS + 1) if offset]
+    missing = [w for w in neighbours if (w, version, threshold) not in cache]
+    if missing:
+        # Store snapshots are never modified, so the workers can read them as-is
+        executor = get_prefetch_executor()
+        for w in missing:
+            cache.prefetch(executor, (w, version, threshold),
+                           partial(build_week_view, w, travel_data, team_members, threshold))
+    return view
+
 def export_to_excel_advanced():
     """Export data to Excel with multiple sheets"""
     output = BytesIO()
@@ -412,46 +800,183 @@ def generate_weekly_report():
     
     return report
 
-# MAIN APP
-st.markdown("<h1 style='text-align: center; color: #6B46C1; margin-bottom: 0;'>🌍 OCM Team Travel Tracker</h1>", unsafe_allow_html=True)
-st.markdown(f"<p style='text-align: center; color: #9CA3AF; margin-top: 0;'>{datetime.date.today().strftime('%A, %B %d, %Y')}</p>", unsafe_allow_html=True)
+def calculate_total_spent():
+    """Total cost of approved business travel"""
+    return sum(v.get('daily_cost', 0) for v in st.session_state.travel_data.values() 
+               if v.get('status') == 'business' and v.get('approved', True))
 
-# Show notifications
-stats = calculate_weekly_stats(st.session_state.get('current_week', datetime.date.today()))
-if stats['pending_approvals'] > 0:
-    st.warning(f"⚠️ You have {stats['pending_approvals']} pending travel approvals")
+def calculate_year_totals():
+    """Calculate year-to-date totals for the sidebar"""
+    total_business = sum(1 for v in st.session_state.travel_data.values() 
+                        if v.get('status') == 'business' and v.get('approved', True))
+    total_vacation = sum(1 for v in st.session_state.travel_data.values() 
+                        if v.get('status') == 'vacation')
+    return total_business, total_vacation, calculate_total_spent()
 
-# Tabs
-tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
-    "📅 Calendar", 
-    "✅ Approvals", 
-    "📊 Analytics", 
-    "💰 Budget", 
-    "📧 Notifications",
-    "⚙️ Settings"
-])
+def build_analytics_figures():
+    """Build the business travel and vacation bar charts"""
+    travel_by_person = {}
+    vacation_by_person = {}
+    
+    for key, value in st.session_state.travel_data.items():
+        name = key.rsplit('_', 1)[0]
+        if value.get('status') == 'business' and value.get('approved', True):
+            travel_by_person[name] = travel_by_person.get(name, 0) + 1
+        elif value.get('status') == 'vacation':
+            vacation_by_person[name] = vacation_by_person.get(name, 0) + 1
+    
+    travel_fig = None
+    if travel_by_person:
+        df = pd.DataFrame(list(travel_by_person.items()), columns=['Person', 'Days'])
+        travel_fig = px.bar(df, x='Person', y='Days', title='Business Travel Days',
+                            color_discrete_sequence=['#9333EA'])
+    
+    vacation_fig = None
+    if vacation_by_person:
+        df = pd.DataFrame(list(vacation_by_person.items()), columns=['Person', 'Days'])
+        vacation_fig = px.bar(df, x='Person', y='Days', title='Vacation Days',
+                              color_discrete_sequence=['#F59E0B'])
+    
+    return travel_fig, vacation_fig
 
-with tab1:
+def build_budget_figure(total_spent, annual_budget):
+    """Build the budget status pie chart"""
+    fig = go.Figure(data=[go.Pie(
+        labels=['Spent', 'Remaining'],
+        values=[total_spent, max(0, annual_budget - total_spent)],
+        hole=.4,
+        marker_colors=['#9333EA', '#E5E7EB']
+    )])
+    fig.update_layout(title="Budget Status")
+    return fig
+
+# Year heatmap cell codes, in colour-scale order
+YEAR_STATUS_LABELS = ['Office', 'Business Travel', 'Pending Approval', 'Vacation']
+YEAR_STATUS_COLORS = ['#F3F4F6', '#9333EA', '#EF4444', '#F59E0B']
+
+def build_year_matrix(year):
+    """Members x working-days status codes and daily costs for a year"""
+    names = [m['name'] for m in st.session_state.team_members]
+    days = np.arange(f'{year}-01-01', f'{year + 1}-01-01', dtype='datetime64[D]')
+    days = days[np.is_busday(days)]
+    row_of = {name: i for i, name in enumerate(names)}
+    col_of = {str(day): j for j, day in enumerate(days)}
+    
+    rows, cols, codes, costs = [], [], [], []
+    for key, value in st.session_state.travel_data.items():
+        name, date = key.rsplit('_', 1)
+        i = row_of.get(name)
+        j = col_of.get(date)
+        if i is None or j is None:
+            continue
+        status = value.get('status')
+        if status == 'business':
+            codes.append(1 if value.get('approved', True) else 2)
+            costs.append(value.get('daily_cost', 500))
+        elif status == 'vacation':
+            codes.append(3)
+            costs.append(0)
+        else:
+            continue
+        rows.append(i)
+        cols.append(j)
+    
+    status_matrix = np.zeros((len(names), len(days)), dtype=np.int8)
+    cost_matrix = np.zeros((len(names), len(days)))
+    status_matrix[rows, cols] = codes
+    cost_matrix[rows, cols] = costs
+    return names, days, status_matrix, cost_matrix
+
+def build_year_figure(year):
+    """Single heatmap of the whole team's year"""
+    names, days, status_matrix, cost_matrix = build_year_matrix(year)
+    
+    # Stepped colour scale so each status code maps to one flat colour
+    n = len(YEAR_STATUS_COLORS)
+    colorscale = []
+    for code, color in enumerate(YEAR_STATUS_COLORS):
+        colorscale += [[code / n, color], [(code + 1) / n, color]]
+    
+    fig = go.Figure(data=go.Heatmap(
+        z=status_matrix,
+        x=days.astype(str),
+        y=names,
+        zmin=-0.5,
+        zmax=n - 0.5,
+        colorscale=colorscale,
+        # Per-cell payload stays numeric (plotly sends typed arrays): customdata is
+        # (whole-dollar cost, status code) and the colour legend names each code
+        colorbar=dict(tickvals=list(range(n)), thickness=12,
+                      ticktext=[f"{code} {label}" for code, label in enumerate(YEAR_STATUS_LABELS)]),
+        customdata=np.stack([np.rint(cost_matrix), status_matrix], axis=-1).astype(np.int32),
+        hovertemplate="<b>%{y}</b><br>%{x}<br>Status: %{customdata[1]}<br>"
+                      "Cost: $%{customdata[0]:,.0f}<extra></extra>",
+        xgap=1,
+        ygap=1
+    ))
+    fig.update_layout(
+        title=f"{year} at a Glance",
+        height=max(300, 22 * len(names) + 120),
+        yaxis=dict(autorange='reversed'),
+        xaxis=dict(type='date', tickformat='%b'),
+        margin=dict(l=10, r=10, t=50, b=10)
+    )
+    return fig
+
+def jump_to_selected_day():
+    """Move the Calendar tab to the week of the clicked heatmap cell"""
+    points = st.session_state.year_heatmap.selection.points
+    if points:
+        st.session_state.current_week = datetime.date.fromisoformat(str(points[0]['x'])[:10])
+
+# Page fragments - each reruns on its own instead of re-executing the whole script.
+# Edits rerun only their own fragment; the other panels are cached against the
+# store version and pick up the new data on their next run.
+@st.fragment
+def calendar_grid():
+    """Pending banner, week navigation, day cells and weekly metrics"""
+    refresh_shared_data()
+    # Every pending request, not just the week shown
+    pending_count = len(st.session_state.approvals_pending)
+    if pending_count > 0:
+        st.warning(f"⚠️ You have {pending_count} pending travel approvals")
+    
+    shown_year = st.session_state.current_week.year
     # Week navigation
     col1, col2, col3 = st.columns([1, 3, 1])
     
-    if 'current_week' not in st.session_state:
-        st.session_state.current_week = datetime.date.today()
-    
     with col1:
         if st.button("← Previous", use_container_width=True):
             st.session_state.current_week -= timedelta(weeks=1)
     
-    with col2:
-        st.markdown(f"<h3 style='text-align: center; color: #374151;'>Week of {get_week_range(st.session_state.current_week)}</h3>", unsafe_allow_html=True)
-    
     with col3:
         if st.button("Next →", use_container_width=True):
             st.session_state.current_week += timedelta(weeks=1)
     
+    with col2:
+        st.markdown(f"<h3 style='text-align: center; color: #374151;'>Week of {get_week_range(st.session_state.current_week)}</h3>", unsafe_allow_html=True)
+    
     if st.button("📍 Today", use_container_width=True):
         st.session_state.current_week = datetime.date.today()
     
+    if st.session_state.current_week.year != shown_year:
+        # The Year tab follows the calendar's year
+        st.rerun()
+    
+    undo_col, redo_col = st.columns(2)
+    undo_stack = st.session_state.undo_stack
+    redo_stack = st.session_state.redo_stack
+    if undo_col.button("↶ Undo", use_container_width=True, disabled=not undo_stack,
+                       help=f"Undo {undo_stack[-1]['label']}" if undo_stack else None):
+        undo_last_edit()
+        rerun_fragment()
+    if redo_col.button("↷ Redo", use_container_width=True, disabled=not redo_stack,
+                       help=f"Redo {redo_stack[-1]['label']}" if redo_stack else None):
+        redo_last_edit()
+        rerun_fragment()
+    if 'edit_notice' in st.session_state:
+        st.warning(st.session_state.pop('edit_notice'))
+    
     st.markdown("---")
     
     # Calendar header
@@ -468,81 +993,120 @@ with tab1:
         else:
             header_cols[i+1].markdown(f"**{day}**<br>{date.strftime('%b %d')}", unsafe_allow_html=True)
     
-    # Team member rows
-    for member in st.session_state.team_members:
+    # Team member rows, rendered from the week's view-model
+    week_view = get_week_view(st.session_state.current_week)
+    for member, cells in zip(st.session_state.team_members, week_view['rows']):
         cols = st.columns([2] + [1]*5)
         
         # Name and role
         cols[0].markdown(f"**{member['name']}**<br><small>{member['role']}</small>", unsafe_allow_html=True)
         
         # Day buttons
-        for i, date in enumerate(week_dates):
-            date_str = date.strftime('%Y-%m-%d')
-            key = f"{member['name']}_{date_str}"
-            data = st.session_state.travel_data.get(key, {'status': 'office'})
-            
-            # Determine button appearance
-            status = data.get('status', 'office')
-            needs_approval = False
-            
-            if status == 'business':
-                # Check if needs approval
-                cost = data.get('daily_cost', 500)
-                if cost > st.session_state.budget_data['requires_approval_above'] and not member.get('is_manager'):
-                    if not data.get('approved', False):
-                        needs_approval = True
-                        icon = "⏳"
-                    else:
-                        icon = "✈️"
-                else:
-                    icon = "✈️"
-                button_clicked = cols[i+1].button(icon, key=f"btn_{key}", use_container_width=True, type="primary")
-            elif status == 'vacation':
-                icon = "🏖️"
-                button_clicked = cols[i+1].button(icon, key=f"btn_{key}", use_container_width=True, type="secondary")
-            else:
-                icon = "🏢"
-                button_clicked = cols[i+1].button(icon, key=f"btn_{key}", use_container_width=True)
-            
-            if button_clicked:
+        for i, (date, (key, icon, button_type)) in enumerate(zip(week_dates, cells)):
+            if cols[i+1].button(icon, key=f"btn_{key}", use_container_width=True, type=button_type):
+                date_str = date.strftime('%Y-%m-%d')
+                data = data_store.get(key) or {'status': 'office'}
+                
                 # Cycle to next status
                 next_status = cycle_status(data)
                 
-                if next_status == 'office':
-                    st.session_state.travel_data[key] = {'status': 'office'}
-                elif next_status == 'business':
-                    cost = st.session_state.budget_data['default_daily_rate']
-                    needs_approval = cost > st.session_state.budget_data['requires_approval_above'] and not member.get('is_manager')
-                    
-                    st.session_state.travel_data[key] = {
-                        'status': 'business',
-                        'daily_cost': cost,
-                        'approved': not needs_approval
-                    }
-                    
-                    if needs_approval:
-                        st.session_state.approvals_pending.append(key)
-                        send_approval_request(member['name'], date_str, cost)
+                with edit_batch(f"{member['name']} {date_str}"):
+                    if next_status == 'office':
+                        set_cell(key, {'status': 'office'})
+                    elif next_status == 'business':
+                        cost = st.session_state.budget_data['default_daily_rate']
+                        needs_approval = cost > st.session_state.budget_data['requires_approval_above'] and not member.get('is_manager')
+                        
+                        set_cell(key, {
+                            'status': 'business',
+                            'daily_cost': cost,
+                            'approved': not needs_approval
+                        })
                         
-                else:  # vacation
-                    st.session_state.travel_data[key] = {'status': 'vacation'}
-                    # Send calendar invite
-                    if st.session_state.email_config['notification_enabled']:
-                        ics = send_calendar_invite(member['email'], [date], 'Vacation')
+                        if needs_approval:
+                            run_approval_policy([key])
+                            if data_store.is_pending(key):
+                                send_approval_request(member['name'], date_str, cost)
+                            
+                    else:  # vacation
+                        set_cell(key, {'status': 'vacation'})
+                        # Send calendar invite
+                        if st.session_state.email_config['notification_enabled']:
+                            ics = send_calendar_invite(member['email'], [date], 'Vacation')
                 
-                st.rerun()
+                rerun_fragment()
     
     # Statistics
+    week_stats = week_view['stats']
     st.markdown("---")
     col1, col2, col3, col4, col5, col6 = st.columns(6)
-    col1.metric("Business Days", stats['business_days'])
-    col2.metric("Vacation Days", stats['vacation_days'])
-    col3.metric("Team Traveling", stats['business_travelers'], help="People on business travel only")
-    col4.metric("Month Travel", stats['month_business_days'])
-    col5.metric("Week Cost", f"${stats['week_cost']:,.0f}")
-    col6.metric("Month Cost", f"${stats['month_cost']:,.0f}")
+    col1.metric("Business Days", week_stats['business_days'])
+    col2.metric("Vacation Days", week_stats['vacation_days'])
+    col3.metric("Team Traveling", week_stats['business_travelers'], help="People on business travel only")
+    col4.metric("Month Travel", week_stats['month_business_days'])
+    col5.metric("Week Cost", f"${week_stats['week_cost']:,.0f}")
+    col6.metric("Month Cost", f"${week_stats['month_cost']:,.0f}")
 
-with tab2:
+def approval_policy_editor():
+    """Form for the auto-approval rules"""
+    policy = approval_policy
+    
+    with st.expander("🤖 Auto-Approval Rules"):
+        with st.form("approval_policy_form"):
+            enabled = st.checkbox("Enable auto-approval", value=policy['enabled'])
+            monthly_budget = st.number_input("Monthly Travel Budget ($, 0 = annual / 12)",
+                                             min_value=0, value=int(policy['monthly_budget']), step=1000)
+            
+            roles = sorted({m['role'] for m in st.session_state.team_members})
+            # Float columns (NaN = no cap) so the editor only accepts numbers
+            cap_column = {'Daily Cap ($)': st.column_config.NumberColumn(min_value=0)}
+            role_caps = st.data_editor(
+                pd.DataFrame({'Role': roles,
+                              'Daily Cap ($)': pd.Series([policy['role_caps'].get(r) for r in roles], dtype=float)}),
+                column_config=cap_column, disabled=['Role'], hide_index=True, key="role_caps_editor",
+                use_container_width=True
+            )
+            
+            names = [m['name'] for m in st.session_state.team_members]
+            member_caps = st.data_editor(
+                pd.DataFrame({'Team Member': names,
+                              'Daily Cap ($)': pd.Series([policy['member_caps'].get(n) for n in names], dtype=float)}),
+                column_config=cap_column, disabled=['Team Member'], hide_index=True, key="member_caps_editor",
+                use_container_width=True
+            )
+            
+            blackout = st.text_area("Blackout Dates (YYYY-MM-DD, one per line)",
+                                    value="\n".join(policy['blackout_dates']))
+            st.caption("Requests at or under the member's cap (else the role's cap) are approved while the "
+                       "month has budget left. Requests on blackout dates are rejected.")
+            
+            if st.form_submit_button("Save and Apply Rules"):
+                try:
+                    blackout_dates = sorted({datetime.date.fromisoformat(d.strip()).isoformat()
+                                             for d in blackout.split("\n") if d.strip()})
+                except ValueError as e:
+                    st.error(f"Invalid blackout date: {str(e)}")
+                    return
+                
+                policy.update({
+                    'enabled': enabled,
+                    'monthly_budget': monthly_budget,
+                    'annual_budget': st.session_state.budget_data['annual_budget'],
+                    'role_caps': {r: float(c) for r, c in zip(role_caps['Role'], role_caps['Daily Cap ($)'])
+                                  if pd.notna(c)},
+                    'member_caps': {n: float(c) for n, c in zip(member_caps['Team Member'], member_caps['Daily Cap ($)'])
+                                    if pd.notna(c)},
+                    'blackout_dates': blackout_dates
+                })
+                with edit_batch("auto-approval rules"):
+                    approved, rejected = run_approval_policy()
+                st.success(f"Rules saved: {approved} approved, {rejected} rejected")
+                rerun_fragment()
+
+@st.fragment
+def approvals_panel():
+    """Manager approval queue"""
+    refresh_shared_data()
     st.header("✅ Travel Approvals")
     
     # Check if user is manager
@@ -572,72 +1136,138 @@ with tab2:
                 col1.write(f"**{item['name']}** - {item['date']}")
                 col2.write(f"${item['cost']:,.0f}")
                 
-                if col3.button("✅ Approve", key=f"approve_{item['key']}"):
-                    st.session_state.travel_data[item['key']]['approved'] = True
-                    st.session_state.approvals_pending.remove(item['key'])
-                    # Send notification
-                    member = next((m for m in st.session_state.team_members if m['name'] == item['name']), None)
-                    if member:
-                        send_email_notification(
-                            member['email'],
-                            "Travel Approved",
-                            f"Your travel request for {item['date']} has been approved."
-                        )
+                # A request settled in another session since this page was drawn is left alone
+                if col3.button("✅ Approve", key=f"approve_{item['key']}") and data_store.is_pending(item['key']):
+                    with edit_batch(f"approval of {item['name']} {item['date']}"):
+                        set_cell(item['key'], {**data_store.get(item['key']), 'approved': True})
+                        # Send notification
+                        member = next((m for m in st.session_state.team_members if m['name'] == item['name']), None)
+                        if member:
+                            queue_notification(
+                                member['email'],
+                                "Travel Approved",
+                                f"Your travel request for {item['date']} has been approved.",
+                                {'kind': 'approved', 'member': item['name'], 'date': item['date'], 'cost': item['cost']}
+                            )
                     st.success(f"Approved travel for {item['name']}")
-                    st.rerun()
+                    rerun_fragment()
                 
-                if col4.button("❌ Reject", key=f"reject_{item['key']}"):
-                    st.session_state.travel_data[item['key']] = {'status': 'office'}
-                    st.session_state.approvals_pending.remove(item['key'])
+                if col4.button("❌ Reject", key=f"reject_{item['key']}") and data_store.is_pending(item['key']):
+                    with edit_batch(f"rejection of {item['name']} {item['date']}"):
+                        set_cell(item['key'], {'status': 'office'})
                     st.info(f"Rejected travel for {item['name']}")
-                    st.rerun()
+                    rerun_fragment()
         else:
             st.info("No pending approvals")
+        
+        approval_policy_editor()
     else:
         st.info("Only managers can approve travel requests")
 
-with tab3:
-    st.header("📊 Analytics")
-    
-    # Prepare data for visualizations
-    travel_by_person = {}
-    vacation_by_person = {}
-    
-    for key, value in st.session_state.travel_data.items():
-        name = key.rsplit('_', 1)[0]
-        if value.get('status') == 'business' and value.get('approved', True):
-            travel_by_person[name] = travel_by_person.get(name, 0) + 1
-        elif value.get('status') == 'vacation':
-            vacation_by_person[name] = vacation_by_person.get(name, 0) + 1
+@st.fragment
+def analytics_panel():
+    """Business travel and vacation charts"""
+    travel_fig, vacation_fig = cached_by_version('analytics_figures', build_analytics_figures)
     
     col1, col2 = st.columns(2)
     
     with col1:
         # Business travel chart
-        if travel_by_person:
-            df = pd.DataFrame(list(travel_by_person.items()), columns=['Person', 'Days'])
-            fig = px.bar(df, x='Person', y='Days', title='Business Travel Days',
-                        color_discrete_sequence=['#9333EA'])
-            st.plotly_chart(fig, use_container_width=True)
+        if travel_fig is not None:
+            st.plotly_chart(travel_fig, use_container_width=True)
         else:
             st.info("No business travel data yet")
     
     with col2:
         # Vacation chart
-        if vacation_by_person:
-            df = pd.DataFrame(list(vacation_by_person.items()), columns=['Person', 'Days'])
-            fig = px.bar(df, x='Person', y='Days', title='Vacation Days',
-                        color_discrete_sequence=['#F59E0B'])
-            st.plotly_chart(fig, use_container_width=True)
+        if vacation_fig is not None:
+            st.plotly_chart(vacation_fig, use_container_width=True)
         else:
             st.info("No vacation data yet")
-    
-    # Generate report button
+
+@st.fragment
+def weekly_report_panel():
+    """On-demand weekly report"""
     if st.button("📊 Generate Weekly Report"):
         report = generate_weekly_report()
         st.success("Weekly report generated and sent!")
         st.markdown(report, unsafe_allow_html=True)
 
+@st.fragment
+def budget_status_panel():
+    """Budget pie chart and spend metrics"""
+    annual_budget = st.session_state.budget_data['annual_budget']
+    total_spent = cached_by_version('total_spent', calculate_total_spent)
+    remaining = annual_budget - total_spent
+    
+    # Budget chart
+    fig = cached_by_version('budget_figure', lambda: build_budget_figure(total_spent, annual_budget),
+                            annual_budget)
+    st.plotly_chart(fig, use_container_width=True)
+    
+    st.metric("Total Spent", f"${total_spent:,.0f}")
+    st.metric("Remaining", f"${remaining:,.0f}")
+
+@st.fragment
+def export_panel():
+    """Excel download"""
+    st.subheader("Export Data")
+    
+    excel_file = cached_by_version('excel_export', lambda: export_to_excel_advanced().getvalue(),
+                                   st.session_state.budget_data['annual_budget'])
+    if excel_file:
+        st.download_button(
+            "📥 Download Full Report (Excel)",
+            data=excel_file,
+            file_name=f"travel_report_{datetime.date.today()}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+
+@st.cache_resource
+def start_api_server(port):
+    """Start the read-only JSON API once per server process"""
+    return api.start_server_thread(DATA_STORE_PATH, port=port)
+
+# MAIN APP
+if os.environ.get('OCM_API_PORT'):
+    start_api_server(int(os.environ['OCM_API_PORT']))
+
+st.markdown("<h1 style='text-align: center; color: #6B46C1; margin-bottom: 0;'>🌍 OCM Team Travel Tracker</h1>", unsafe_allow_html=True)
+st.markdown(f"<p style='text-align: center; color: #9CA3AF; margin-top: 0;'>{datetime.date.today().strftime('%A, %B %d, %Y')}</p>", unsafe_allow_html=True)
+
+if 'current_week' not in st.session_state:
+    st.session_state.current_week = datetime.date.today()
+
+# Tabs
+tab1, tab_year, tab2, tab3, tab4, tab5, tab6 = st.tabs([
+    "📅 Calendar", 
+    "🗓️ Year", 
+    "✅ Approvals", 
+    "📊 Analytics", 
+    "💰 Budget", 
+    "📧 Notifications",
+    "⚙️ Settings"
+])
+
+with tab1:
+    calendar_grid()
+
+with tab_year:
+    # Not a fragment: a click has to rerun the Calendar tab as well
+    year = st.session_state.current_week.year
+    year_fig = cached_by_version('year_figure', lambda: build_year_figure(year), year)
+    st.plotly_chart(year_fig, use_container_width=True, key="year_heatmap",
+                    on_select=jump_to_selected_day, selection_mode="points")
+    st.caption("Click a day to open its week in the Calendar tab.")
+
+with tab2:
+    approvals_panel()
+
+with tab3:
+    st.header("📊 Analytics")
+    analytics_panel()
+    weekly_report_panel()
+
 with tab4:
     st.header("💰 Budget Management")
     
@@ -650,6 +1280,12 @@ with tab4:
                                     step=1000)
         if new_budget != st.session_state.budget_data['annual_budget']:
             st.session_state.budget_data['annual_budget'] = new_budget
+            approval_policy['annual_budget'] = new_budget
+            # More (or less) monthly headroom can settle queued requests
+            with edit_batch("budget change") as edit:
+                run_approval_policy()
+            if edit['deltas']:
+                st.rerun()
         
         daily_rate = st.number_input("Daily Rate ($)",
                                     value=st.session_state.budget_data['default_daily_rate'],
@@ -664,23 +1300,7 @@ with tab4:
             st.session_state.budget_data['requires_approval_above'] = approval_threshold
     
     with col2:
-        # Calculate spending
-        total_spent = sum(v.get('daily_cost', 0) for v in st.session_state.travel_data.values() 
-                         if v.get('status') == 'business' and v.get('approved', True))
-        remaining = st.session_state.budget_data['annual_budget'] - total_spent
-        
-        # Budget chart
-        fig = go.Figure(data=[go.Pie(
-            labels=['Spent', 'Remaining'],
-            values=[total_spent, max(0, remaining)],
-            hole=.4,
-            marker_colors=['#9333EA', '#E5E7EB']
-        )])
-        fig.update_layout(title="Budget Status")
-        st.plotly_chart(fig, use_container_width=True)
-        
-        st.metric("Total Spent", f"${total_spent:,.0f}")
-        st.metric("Remaining", f"${remaining:,.0f}")
+        budget_status_panel()
 
 with tab5:
     st.header("📧 Email Notifications")
@@ -706,6 +1326,35 @@ with tab5:
             value=st.session_state.email_config['notification_enabled']
         )
         
+        st.session_state.email_config['send_delay_seconds'] = st.number_input(
+            "Send Delay (seconds)",
+            min_value=0,
+            value=st.session_state.email_config['send_delay_seconds'],
+            step=10,
+            help="Approval emails wait this long so an Undo can still cancel them"
+        )
+        
+        st.session_state.email_config['digest_window_seconds'] = 60 * st.number_input(
+            "Digest Window (minutes)",
+            min_value=0,
+            value=st.session_state.email_config['digest_window_seconds'] // 60,
+            step=5,
+            help="Approval emails to the same person are collected this long and sent as one digest"
+        )
+        
+        st.session_state.email_config['digest_max_items'] = st.number_input(
+            "Digest Size Limit",
+            min_value=1,
+            value=st.session_state.email_config['digest_max_items'],
+            step=5,
+            help="A digest is sent early once it holds this many items"
+        )
+        
+        notification_stats = notification_outbox.stats
+        if notification_stats['notifications'] or len(notification_outbox):
+            st.caption(f"{notification_stats['notifications']} notifications sent as "
+                       f"{notification_stats['emails']} emails, {len(notification_outbox)} waiting")
+        
         if st.button("Test Email Configuration"):
             if send_email_notification(
                 st.session_state.email_config['sender_email'],
@@ -751,16 +1400,7 @@ with tab6:
     col1, col2 = st.columns(2)
     
     with col1:
-        st.subheader("Export Data")
-        
-        excel_file = export_to_excel_advanced()
-        if excel_file:
-            st.download_button(
-                "📥 Download Full Report (Excel)",
-                data=excel_file,
-                file_name=f"travel_report_{datetime.date.today()}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
+        export_panel()
         
         # Power Automate webhook
         st.subheader("Power Automate Integration")
@@ -794,6 +1434,32 @@ with tab6:
                         st.error(f"Error: {response.status_code}")
                 except Exception as e:
                     st.error(f"Failed to send data: {str(e)}")
+        
+        st.subheader("Undo History")
+        undo_depth = st.number_input("Undo Steps Kept",
+                                     min_value=1,
+                                     value=st.session_state.undo_settings['max_depth'],
+                                     step=10)
+        if undo_depth != st.session_state.undo_settings['max_depth']:
+            set_undo_depth(undo_depth)
+        
+        st.subheader("Storage")
+        store_stats = data_store.stats
+        stored_col, tombstone_col, dropped_col = st.columns(3)
+        stored_col.metric("Stored Cells", len(data_store))
+        tombstone_col.metric("Tombstones", len(data_store.tombstones))
+        dropped_col.metric("Compacted", store_stats['dropped'])
+        if store_stats['last_compaction']:
+            st.caption(f"{store_stats['compactions']} compactions, last at {store_stats['last_compaction']}")
+        
+        st.subheader("Week View Cache")
+        week_cache = st.session_state.week_view_cache
+        hits_col, waits_col, misses_col, rate_col = st.columns(4)
+        hits_col.metric("Hits", week_cache.hits)
+        waits_col.metric("Prefetch Waits", week_cache.waits, help="Lookups that waited for an in-flight prefetch")
+        misses_col.metric("Misses", week_cache.misses)
+        rate_col.metric("Hit Rate", f"{week_cache.hit_rate():.0%}")
+        st.caption(f"{week_cache.prefetched} weeks prefetched in the background")
     
     with col2:
         st.subheader("Team Management")
@@ -807,12 +1473,13 @@ with tab6:
             
             if st.button("Add"):
                 if new_name and new_role and new_email:
-                    st.session_state.team_members.append({
+                    data_store.add_member({
                         "name": new_name,
                         "role": new_role,
                         "email": new_email,
                         "is_manager": is_manager
                     })
+                    mark_data_changed()
                     st.success(f"Added {new_name}")
                     st.rerun()
         
@@ -831,17 +1498,12 @@ with st.sidebar:
     st.header("📊 Year Summary")
     
     # Calculate totals
-    total_business = sum(1 for v in st.session_state.travel_data.values() 
-                        if v.get('status') == 'business' and v.get('approved', True))
-    total_vacation = sum(1 for v in st.session_state.travel_data.values() 
-                        if v.get('status') == 'vacation')
-    total_cost = sum(v.get('daily_cost', 0) for v in st.session_state.travel_data.values() 
-                    if v.get('status') == 'business' and v.get('approved', True))
+    total_business, total_vacation, total_cost = cached_by_version('year_totals', calculate_year_totals)
     
     st.metric("YTD Business Travel", f"{total_business} days")
     st.metric("YTD Vacation", f"{total_vacation} days")
     st.metric("YTD Cost", f"${total_cost:,.0f}")
-    st.metric("Pending Approvals", stats['pending_approvals'])
+    st.metric("Pending Approvals", len(st.session_state.approvals_pending))
     
     st.markdown("---")
     st.markdown("""
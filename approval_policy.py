@@ -0,0 +1,34 @@
+"""Vectorized core of the auto-approval rules.
+
+Free of Streamlit so it can be tested on its own: app.py compiles the rules
+into arrays and hands the pending requests to decide_requests().
+"""
+import numpy as np
+
+
+def decide_requests(member_idx, dates, costs, caps, blackout, monthly_budget, monthly_spend):
+    """Approve and reject masks for pending requests, in one pass
+
+    member_idx indexes caps (-1 = never auto-approve), dates are
+    datetime64[D] and monthly_spend maps 'YYYY-MM' to the approved spend so
+    far. Requests on blackout dates are rejected. Requests at or under their
+    cap are approved in date order until their month's budget runs out.
+    """
+    reject = np.isin(dates, blackout)
+    candidates = ~reject & (costs <= caps[member_idx])
+
+    # Running total of candidate costs within each month, in date order
+    months, month_of = np.unique(dates.astype('datetime64[M]'), return_inverse=True)
+    spent = np.array([monthly_spend.get(str(m), 0) for m in months], dtype=float)
+
+    order = np.lexsort((dates, month_of))
+    group = month_of[order]
+    requested = np.where(candidates, costs, 0)[order]
+    running = np.cumsum(requested)
+    starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+    before_group = running[starts] - requested[starts]
+    running -= np.repeat(before_group, np.diff(np.r_[starts, len(group)]))
+
+    approve = np.zeros(len(dates), dtype=bool)
+    approve[order] = candidates[order] & (spent[group] + running <= monthly_budget)
+    return approve, reject
@@ -0,0 +1,221 @@
+"""Process-wide travel data store shared by every app session.
+
+app.py hands one TravelDataStore per server process to all sessions (via
+st.cache_resource), so sessions edit the same cells instead of each writing
+back its own copy. Changes are published to a JSON file (atomic replace)
+that api.py serves, by a writer thread so no edit waits on the disk.
+"""
+import atexit
+import datetime
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def is_office(value):
+    """Absent cells and explicit office cells both mean office"""
+    return value is None or value.get('status', 'office') == 'office'
+
+
+class TravelDataStore:
+    """Cells, approval queue and team members behind one lock
+
+    Office is the implicit default: writing office to a stored cell leaves a
+    tombstone that compact() drops later. Readers take snapshot(), which
+    never contains office cells and is rebuilt at most once per version.
+    """
+
+    def __init__(self, path, default_team=None):
+        self.path = path
+        self._lock = threading.RLock()
+        self._cells = {}
+        self._pending = []
+        self._team = []
+        self._snapshot = None
+        self._compactor = None
+        self._file_lock = threading.Lock()
+        self._saved_version = None
+        self._save_wanted = threading.Condition()
+        self._save_pending = False
+        self._writer = None
+        self.tombstones = set()
+        self.version = 0
+        self.stats = {'compactions': 0, 'dropped': 0, 'last_compaction': None}
+        self.load(default_team or [])
+
+    def load(self, default_team):
+        """Read the published file, falling back to an empty store"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        with self._lock:
+            self._cells = {k: v for k, v in data.get('travel_data', {}).items() if not is_office(v)}
+            self._pending = [k for k in data.get('approvals_pending', []) if k in self._cells]
+            self._team = [dict(m) for m in data.get('team_members') or default_team]
+            self.tombstones.clear()
+            self.version += 1
+
+    def snapshot(self):
+        """Read-only view of the current data: version, travel_data, approvals_pending, team_members"""
+        with self._lock:
+            if self._snapshot is None or self._snapshot['version'] != self.version:
+                self._snapshot = {
+                    'version': self.version,
+                    'travel_data': {k: v for k, v in self._cells.items() if not is_office(v)},
+                    'approvals_pending': list(self._pending),
+                    'team_members': [dict(m) for m in self._team]
+                }
+            return self._snapshot
+
+    def __len__(self):
+        """Stored cells, tombstones included"""
+        with self._lock:
+            return len(self._cells)
+
+    def get(self, key):
+        """Current value of one cell, None for office"""
+        with self._lock:
+            value = self._cells.get(key)
+            return None if is_office(value) else value
+
+    def is_pending(self, key):
+        with self._lock:
+            return key in self._pending
+
+    def write(self, key, value):
+        """Store a cell, keep the approval queue in step and return the previous value"""
+        with self._lock:
+            before = self._write(key, value)
+            self.version += 1
+            return before
+
+    def apply(self, changes, expect):
+        """Write several cells atomically, skipping any that moved on since the caller saw them
+
+        changes is [(key, value)] and expect maps each key to the value the
+        caller last saw (None for office). Returns the conflicting keys, which
+        are left as they are.
+        """
+        with self._lock:
+            conflicts = [key for key, _ in changes if self.get(key) != expect[key]]
+            for key, value in changes:
+                if key not in conflicts:
+                    self._write(key, value)
+            if len(conflicts) < len(changes):
+                self.version += 1
+            return conflicts
+
+    def _write(self, key, value):
+        before = self._cells.get(key)
+        if is_office(value):
+            if key in self._cells:
+                self._cells[key] = {'status': 'office'}
+                self.tombstones.add(key)
+            value = None
+        else:
+            self._cells[key] = value
+            self.tombstones.discard(key)
+
+        needs_approval = value is not None and value.get('status') == 'business' and not value.get('approved', True)
+        queued = key in self._pending
+        if needs_approval and not queued:
+            self._pending.append(key)
+        elif queued and not needs_approval:
+            self._pending.remove(key)
+        return None if is_office(before) else before
+
+    def add_member(self, member):
+        with self._lock:
+            self._team.append(dict(member))
+            self.version += 1
+
+    def save(self):
+        """Have the writer thread publish the current data; returns at once
+
+        Saves requested while one is being written collapse into one write of
+        the newest data. Whatever is unsaved at exit is written on the way out.
+        """
+        with self._save_wanted:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="travel-store-writer", daemon=True)
+                self._writer.start()
+                atexit.register(self.flush)
+            self._save_pending = True
+            self._save_wanted.notify()
+
+    def _write_loop(self):
+        while True:
+            with self._save_wanted:
+                while not self._save_pending:
+                    self._save_wanted.wait()
+                self._save_pending = False
+            try:
+                self.flush()
+            except OSError:
+                logger.exception("Failed to publish the data store to %s", self.path)
+
+    def flush(self):
+        """Write the current snapshot to the file now (atomic replace)
+
+        Only the snapshot is taken under the store lock; serializing and
+        writing happen outside it. A snapshot older than the one already on
+        disk is dropped.
+        """
+        snapshot = self.snapshot()
+        with self._file_lock:
+            if self._saved_version is not None and snapshot['version'] <= self._saved_version:
+                return
+            data = {
+                'saved_at': datetime.datetime.now().isoformat(timespec='seconds'),
+                'travel_data': snapshot['travel_data'],
+                'approvals_pending': snapshot['approvals_pending'],
+                'team_members': snapshot['team_members']
+            }
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, separators=(',', ':'))
+                os.replace(tmp_path, self.path)
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self._saved_version = snapshot['version']
+
+    def compact(self):
+        """Drop tombstoned office cells; returns how many were removed"""
+        with self._lock:
+            if not self.tombstones:
+                return 0
+            dropped = 0
+            for key in self.tombstones:
+                if key in self._cells and is_office(self._cells[key]):
+                    del self._cells[key]
+                    dropped += 1
+            self.tombstones.clear()
+
+            self.stats['compactions'] += 1
+            self.stats['dropped'] += dropped
+            self.stats['last_compaction'] = datetime.datetime.now().isoformat(timespec='seconds')
+            return dropped
+
+    def start_compaction(self, interval=10):
+        """Compact from a daemon thread every `interval` seconds"""
+        if self._compactor is not None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                self.compact()
+
+        self._compactor = threading.Thread(target=loop, name="travel-store-compaction", daemon=True)
+        self._compactor.start()
@@ -0,0 +1,361 @@
+"""Headless load-testing harness for the OCM Travel Tracker.
+
+Simulates N concurrent user sessions against app.py using Streamlit's
+AppTest (no browser, no network) and reports per-rerun latency, throughput
+and peak RSS. AppTest swaps Streamlit's global runtime in and out around
+every run, so concurrent sessions run in separate worker processes. Each
+worker stands in for one Streamlit server: its sessions share that
+process's data store, outbox and caches, so store figures are per worker.
+
+Usage:
+    python load_test.py --sessions 50 --actions 20 --members 30
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+ROLES = ["Senior OCM Analyst", "OCM PMO", "OCM Advisor"]
+
+# Relative weight of each simulated click
+ACTION_WEIGHTS = {
+    'cycle': 6,
+    'navigate': 3,
+    'approve': 1,
+    'settings': 1,
+}
+
+
+def generate_dataset(members=7, year=None, business_ratio=0.15, vacation_ratio=0.08,
+                     pending_ratio=0.2, daily_rate=500, seed=0):
+    """Generate synthetic team members, travel data and pending approvals"""
+    rng = random.Random(seed)
+    year = year or datetime.date.today().year
+
+    team_members = [{
+        "name": "Manager 000",
+        "role": "Manager (MD)",
+        "email": "manager.000@example.com",
+        "is_manager": True
+    }]
+    for i in range(1, members):
+        team_members.append({
+            "name": f"Member {i:03d}",
+            "role": rng.choice(ROLES),
+            "email": f"member.{i:03d}@example.com",
+            "is_manager": False
+        })
+
+    travel_data = {}
+    approvals_pending = []
+    current = datetime.date(year, 1, 1)
+    while current.year == year:
+        if current.weekday() < 5:
+            date_str = current.strftime('%Y-%m-%d')
+            for member in team_members:
+                key = f"{member['name']}_{date_str}"
+                roll = rng.random()
+                if roll < business_ratio:
+                    pending = not member['is_manager'] and rng.random() < pending_ratio
+                    travel_data[key] = {
+                        'status': 'business',
+                        'daily_cost': daily_rate,
+                        'approved': not pending
+                    }
+                    if pending:
+                        approvals_pending.append(key)
+                elif roll < business_ratio + vacation_ratio:
+                    travel_data[key] = {'status': 'vacation'}
+        current += timedelta(days=1)
+
+    return team_members, travel_data, approvals_pending
+
+
+def _find_button(at, label):
+    return next((b for b in at.button if b.label == label), None)
+
+
+def _metric(at, label):
+    return next((m.value for m in at.metric if m.label == label), None)
+
+
+def _visible_cell_keys(at):
+    return [b.key for b in at.button if b.key and b.key.startswith("btn_")]
+
+
+# Each action reruns the app through run(label, widget), which times every
+# rerun as its own sample
+
+
+def do_cycle(at, rng, run):
+    keys = _visible_cell_keys(at)
+    if keys:
+        run('cycle', at.button(key=rng.choice(keys)).click())
+
+
+def do_navigate(at, rng, run):
+    button = _find_button(at, rng.choice(["← Previous", "Next →", "📍 Today"]))
+    if button is not None:
+        run('navigate', button.click())
+
+
+def do_approve(at, rng, run):
+    selector = next((s for s in at.selectbox if s.label == "Select your name:"), None)
+    if selector is None:
+        return
+    manager = next((o for o in selector.options if o.startswith("Manager")), selector.options[0])
+    if selector.value != manager:
+        run('select_manager', selector.select(manager))
+    approve_buttons = [b for b in at.button if b.key and b.key.startswith("approve_")]
+    if approve_buttons:
+        run('approve', rng.choice(approve_buttons).click())
+
+
+def do_settings(at, rng, run):
+    webhook = next((t for t in at.text_input if t.label == "Webhook URL"), None)
+    if webhook is not None:
+        run('settings', webhook.input(f"https://example.invalid/hook/{rng.randrange(10**6)}"))
+
+
+ACTIONS = {
+    'cycle': do_cycle,
+    'navigate': do_navigate,
+    'approve': do_approve,
+    'settings': do_settings,
+}
+
+
+class LoadResults:
+    """Collector for rerun timings, mergeable across worker processes"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = []
+        self.peak_rss = {}
+        self.store = {}
+        self.week_cache = {'hits': 0, 'waits': 0, 'misses': 0, 'prefetched': 0}
+
+    def record(self, action, seconds):
+        self.latencies.setdefault(action, []).append(seconds)
+
+    def error(self, session_id, action, exc):
+        self.errors.append(f"session {session_id} {action}: {exc!r}")
+
+    def merge(self, other):
+        """Merge a worker's results, passed back as vars(LoadResults)"""
+        for action, values in other['latencies'].items():
+            self.latencies.setdefault(action, []).extend(values)
+        self.errors.extend(other['errors'])
+        for pid, peak in other['peak_rss'].items():
+            self.peak_rss[pid] = max(peak, self.peak_rss.get(pid, 0))
+        # The data store is per process, so the last reading of each worker wins
+        self.store.update(other['store'])
+        for name, value in other['week_cache'].items():
+            self.week_cache[name] += value
+
+
+def write_store(path, dataset):
+    """Seed the data store file that app.py loads on its first session"""
+    team_members, travel_data, approvals_pending = dataset
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'travel_data': travel_data,
+            'approvals_pending': approvals_pending,
+            'team_members': team_members
+        }, f)
+
+
+def run_session(session_id, actions, timeout, seed):
+    """Open one app session, perform a sequence of random clicks and return the timings
+
+    Sessions in the same worker process share that process's data store,
+    like sessions on one Streamlit server.
+    """
+    rng = random.Random(seed + session_id)
+    results = LoadResults()
+
+    def run(label, widget):
+        start = time.perf_counter()
+        widget.run()
+        results.record(label, time.perf_counter() - start)
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    run('initial', at)
+
+    names = list(ACTION_WEIGHTS)
+    weights = [ACTION_WEIGHTS[n] for n in names]
+    for _ in range(actions):
+        action = rng.choices(names, weights)[0]
+        try:
+            ACTIONS[action](at, rng, run)
+        except Exception as e:
+            results.error(session_id, action, e)
+            continue
+        if at.exception:
+            results.error(session_id, action, at.exception[0].message)
+
+    results.store = {os.getpid(): {
+        'cells': int(_metric(at, "Stored Cells") or 0),
+        'tombstones': int(_metric(at, "Tombstones") or 0),
+        'dropped': int(_metric(at, "Compacted") or 0)
+    }}
+    week_cache = at.session_state['week_view_cache']
+    results.week_cache = {
+        'hits': week_cache.hits,
+        'waits': week_cache.waits,
+        'misses': week_cache.misses,
+        'prefetched': week_cache.prefetched
+    }
+    results.peak_rss[os.getpid()] = peak_rss_mb()
+    # A plain dict: AppTest rebinds __main__, so this module's classes don't unpickle
+    return vars(results)
+
+
+def run_worker(session_ids, actions, timeout, seed):
+    """Run a worker's share of the sessions one after another, as one server would see them
+
+    One task per worker: once AppTest has rebound __main__, the pool can no
+    longer unpickle further calls into this module.
+    """
+    results = LoadResults()
+    for session_id in session_ids:
+        results.merge(run_session(session_id, actions, timeout, seed))
+    return vars(results)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux, bytes on macOS
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(results, wall_time):
+    """Build the report dictionary from collected timings"""
+    report = {'actions': {}, 'errors': results.errors}
+    all_latencies = []
+    for action, values in sorted(results.latencies.items()):
+        all_latencies.extend(values)
+        report['actions'][action] = {
+            'count': len(values),
+            'mean_ms': statistics.mean(values) * 1000,
+            'p50_ms': percentile(values, 50) * 1000,
+            'p90_ms': percentile(values, 90) * 1000,
+            'p99_ms': percentile(values, 99) * 1000,
+            'max_ms': max(values) * 1000,
+        }
+    report['total_reruns'] = len(all_latencies)
+    report['wall_time_s'] = wall_time
+    report['throughput_rps'] = len(all_latencies) / wall_time if wall_time else 0
+    # Peak of the busiest worker (one simulated server), and the whole run's total
+    report['peak_rss_mb'] = max(results.peak_rss.values(), default=0)
+    report['total_peak_rss_mb'] = sum(results.peak_rss.values())
+    # Workers hold independent copies of the store, so they are reported side by side
+    report['store'] = {str(pid): store for pid, store in sorted(results.store.items())}
+    lookups = sum(results.week_cache[name] for name in ('hits', 'waits', 'misses'))
+    report['week_cache'] = dict(results.week_cache,
+                                hit_rate=results.week_cache['hits'] / lookups if lookups else 0)
+    return report
+
+
+def print_report(report, args):
+    print(f"Sessions: {args.sessions}  Actions/session: {args.actions}  "
+          f"Members: {args.members}  Workers: {args.concurrency} (one simulated server each)")
+    print(f"{'action':<14} {'count':>6} {'mean':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}")
+    for action, row in report['actions'].items():
+        print(f"{action:<14} {row['count']:>6} {row['mean_ms']:>7.1f}ms {row['p50_ms']:>7.1f}ms "
+              f"{row['p90_ms']:>7.1f}ms {row['p99_ms']:>7.1f}ms {row['max_ms']:>7.1f}ms")
+    print(f"Total reruns: {report['total_reruns']} in {report['wall_time_s']:.1f}s "
+          f"({report['throughput_rps']:.1f} reruns/s)")
+    print(f"Peak RSS: {report['peak_rss_mb']:.1f} MB per worker, "
+          f"{report['total_peak_rss_mb']:.1f} MB across workers")
+    for pid, store in report['store'].items():
+        print(f"Store, worker {pid}: {store['cells']} cells, {store['tombstones']} tombstones, "
+              f"{store['dropped']} dropped by compaction")
+    week_cache = report['week_cache']
+    print(f"Week view cache: {week_cache['hits']} hits, {week_cache['waits']} prefetch waits, "
+          f"{week_cache['misses']} misses ({week_cache['hit_rate']:.0%} hits), "
+          f"{week_cache['prefetched']} prefetched")
+    if report['errors']:
+        print(f"Errors: {len(report['errors'])}")
+        for line in report['errors'][:10]:
+            print(f"  {line}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless multi-session load test for app.py")
+    parser.add_argument("--sessions", type=int, default=10, help="number of simulated sessions")
+    parser.add_argument("--actions", type=int, default=20, help="clicks per session")
+    parser.add_argument("--concurrency", type=int, default=0,
+                        help="worker processes, each one simulated server running its share of "
+                             "the sessions in turn (default: up to 4)")
+    parser.add_argument("--members", type=int, default=7, help="team size of the synthetic dataset")
+    parser.add_argument("--year", type=int, default=None, help="year of the synthetic dataset")
+    parser.add_argument("--business-ratio", type=float, default=0.15)
+    parser.add_argument("--vacation-ratio", type=float, default=0.08)
+    parser.add_argument("--pending-ratio", type=float, default=0.2)
+    parser.add_argument("--timeout", type=float, default=60, help="seconds allowed per rerun")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+    if not args.concurrency:
+        args.concurrency = min(4, os.cpu_count() or 1, args.sessions)
+
+    # Keep simulated edits out of the real shared data store
+    store_dir = tempfile.mkdtemp(prefix="ocm_load_test_")
+    os.environ['OCM_DATA_STORE'] = os.path.join(store_dir, 'travel_store.json')
+    try:
+        write_store(os.environ['OCM_DATA_STORE'], generate_dataset(
+            members=args.members,
+            year=args.year,
+            business_ratio=args.business_ratio,
+            vacation_ratio=args.vacation_ratio,
+            pending_ratio=args.pending_ratio,
+            seed=args.seed
+        ))
+
+        results = LoadResults()
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=args.concurrency) as pool:
+            shares = [list(range(args.sessions))[w::args.concurrency] for w in range(args.concurrency)]
+            futures = [pool.submit(run_worker, share, args.actions, args.timeout, args.seed)
+                       for share in shares]
+            for share, future in zip(shares, futures):
+                try:
+                    results.merge(future.result())
+                except Exception as e:
+                    results.error(share[0], 'worker', e)
+        report = summarize(results, time.perf_counter() - start)
+    finally:
+        shutil.rmtree(store_dir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, args)
+    return 1 if report['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+"""Process-wide outbox for notification emails.
+
+Emails wait in the outbox until their undo window has passed, so an Undo in
+the app can still cancel them. The outbox belongs to the server process, not
+to a browser session, and its own thread sends due emails; closing the tab
+never drops queued mail, and anything still queued when the process exits is
+sent on the way out.
+"""
+import atexit
+import logging
+import smtplib
+import threading
+import time
+from email import encoders
+from email.mime.base import MIMEBase
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+logger = logging.getLogger(__name__)
+
+DIGEST_SECTIONS = {
+    'approval_request': "Approval Required",
+    'approved': "Approved",
+    'rejected': "Rejected"
+}
+
+
+def deliver_email(config, to_email, subject, body, attachment=None):
+    """Send one email with the given SMTP settings; False when notifications are off"""
+    if not config['notification_enabled']:
+        return False
+
+    msg = MIMEMultipart()
+    msg['From'] = config['sender_email']
+    msg['To'] = to_email
+    msg['Subject'] = subject
+
+    msg.attach(MIMEText(body, 'html'))
+
+    if attachment:
+        part = MIMEBase('application', 'octet-stream')
+        part.set_payload(attachment.read())
+        encoders.encode_base64(part)
+        part.add_header('Content-Disposition', f'attachment; filename="travel_report.xlsx"')
+        msg.attach(part)
+
+    # Uncomment when email is configured
+    # server = smtplib.SMTP(config['smtp_server'], config['smtp_port'])
+    # server.starttls()
+    # server.login(config['sender_email'], config['sender_password'])
+    # server.send_message(msg)
+    # server.quit()
+
+    return True
+
+
+def build_digest_email(notifications):
+    """Merge several notifications for one recipient into one HTML email"""
+    sections = []
+    for kind, title in DIGEST_SECTIONS.items():
+        items = sorted((n['digest_item'] for n in notifications if n['digest_item']['kind'] == kind),
+                       key=lambda item: (item['date'], item['member']))
+        if not items:
+            continue
+        rows = "".join(
+            f"<tr><td>{item['member']}</td><td>{item['date']}</td><td>${item['cost']:,.2f}</td></tr>"
+            for item in items
+        )
+        total = sum(item['cost'] for item in items)
+        sections.append(f"""
+            <h3>{title} ({len(items)})</h3>
+            <table border="1" cellpadding="6" cellspacing="0">
+                <tr><th>Team Member</th><th>Date</th><th>Cost</th></tr>
+                {rows}
+                <tr><td colspan="2"><strong>Total</strong></td><td><strong>${total:,.2f}</strong></td></tr>
+            </table>""")
+
+    subject = f"Travel Tracker Digest: {len(notifications)} updates"
+    body = f"""
+    <html>
+        <body>
+            <h2>Travel Tracker Updates</h2>
+            {"".join(sections)}
+            <br>
+            <p>Review in the <a href="https://ocm-travel-tracker-nzxvmnkrvw5wknvvkdb7tb.streamlit.app/">Travel Tracker</a></p>
+        </body>
+    </html>
+    """
+    return subject, body
+
+
+class NotificationOutbox:
+    """Queued emails of every session, sent by a background thread
+
+    Each notification carries a copy of the queuing session's email settings
+    (send delay, digest window and size, SMTP account), since the session
+    may be gone by the time it is sent.
+    """
+
+    def __init__(self, send=deliver_email):
+        self._send = send
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._items = []
+        self._next_id = 0
+        self._thread = None
+        self.stats = {'notifications': 0, 'emails': 0}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+    def queue(self, config, to_email, subject, body, digest_item=None):
+        """Queue an email to go out after config['send_delay_seconds']; returns its id
+
+        digest_item ({'kind', 'member', 'date', 'cost'}) lets the email be
+        merged with others to the same recipient into one digest.
+        """
+        now = time.time()
+        with self._lock:
+            notification_id = self._next_id
+            self._next_id += 1
+            self._items.append({
+                'id': notification_id,
+                'config': dict(config),
+                'to': to_email,
+                'subject': subject,
+                'body': body,
+                'digest_item': digest_item,
+                'queued_at': now,
+                'send_after': now + config.get('send_delay_seconds', 30)
+            })
+            # The new item may be due before whatever the flush thread is sleeping until
+            self._wake.notify()
+        return notification_id
+
+    def cancel(self, notification_ids):
+        """Remove unsent notifications and return them"""
+        ids = set(notification_ids)
+        with self._lock:
+            cancelled = [n for n in self._items if n['id'] in ids]
+            self._items = [n for n in self._items if n['id'] not in ids]
+        return cancelled
+
+    def flush(self, force=False):
+        """Send notifications whose undo window has passed, batching digests per recipient
+
+        force sends everything still queued, whatever its window.
+        """
+        now = time.time()
+        with self._lock:
+            ready = {}
+            for notification in self._items:
+                if force or notification['send_after'] <= now:
+                    ready.setdefault(notification['to'], []).append(notification)
+
+            batches = []
+            for to_email, notifications in ready.items():
+                single = [n for n in notifications if not n.get('digest_item')]
+                digest = [n for n in notifications if n.get('digest_item')]
+
+                # Digest items wait for the window to close or the size limit, whichever comes first
+                config = digest[0]['config'] if digest else None
+                oldest = min((n['queued_at'] for n in digest), default=now)
+                if digest and not force and (now - oldest < config['digest_window_seconds']
+                                             and len(digest) < config['digest_max_items']):
+                    digest = []
+                if single or digest:
+                    batches.append((to_email, single, digest))
+
+            sent_ids = {n['id'] for _, single, digest in batches for n in single + digest}
+            self._items = [n for n in self._items if n['id'] not in sent_ids]
+
+        # Sent outside the lock so a slow SMTP server does not block queuing.
+        # stats count only emails actually delivered (not failed or switched off).
+        for to_email, single, digest in batches:
+            delivered = [(1, self._deliver(n['config'], to_email, n['subject'], n['body'])) for n in single]
+            if len(digest) == 1:
+                delivered.append((1, self._deliver(digest[0]['config'], to_email, digest[0]['subject'],
+                                                   digest[0]['body'])))
+            elif digest:
+                delivered.append((len(digest), self._deliver(digest[0]['config'], to_email,
+                                                             *build_digest_email(digest))))
+
+            with self._lock:
+                self.stats['notifications'] += sum(count for count, ok in delivered if ok)
+                self.stats['emails'] += sum(1 for _, ok in delivered if ok)
+
+    def _next_due(self, now):
+        """Seconds until the next undo or digest window ends, None if nothing is waiting
+
+        A digest reaching its size limit is covered too: that happens when one
+        of its items' undo windows ends.
+        """
+        upcoming = []
+        for notification in self._items:
+            upcoming.append(notification['send_after'])
+            if notification['digest_item']:
+                upcoming.append(notification['queued_at'] + notification['config']['digest_window_seconds'])
+        upcoming = [t for t in upcoming if t > now]
+        return min(upcoming) - now if upcoming else None
+
+    def _deliver(self, config, to_email, subject, body):
+        """Send one email; True only if it went out"""
+        try:
+            return bool(self._send(config, to_email, subject, body))
+        except Exception:
+            logger.exception("Failed to send notification to %s", to_email)
+            return False
+
+    def start(self):
+        """Flush from a daemon thread, and once more when the process exits"""
+        if self._thread is not None:
+            return
+
+        def loop():
+            while True:
+                with self._wake:
+                    # Sleep until the next window ends, or until queue() has something sooner
+                    self._wake.wait(self._next_due(time.time()))
+                self.flush()
+
+        self._thread = threading.Thread(target=loop, name="notification-outbox", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush, force=True)
@@ -0,0 +1,127 @@
+"""api.py served on localhost from a temporary store file."""
+import base64
+import gzip
+import http.client
+import json
+import threading
+
+import pytest
+
+from api import MAX_LIMIT, create_server
+
+MEMBERS = [{'name': f"Member {i:02d}", 'role': "OCM Advisor"} for i in range(10)]
+
+
+def write_store(path, days=25, pending_every=7):
+    """Business travel for every member on `days` January days; every Nth cell pending"""
+    travel_data = {}
+    approvals_pending = []
+    for day in range(1, days + 1):
+        for i, member in enumerate(MEMBERS):
+            key = f"{member['name']}_2026-01-{day:02d}"
+            pending = (day * len(MEMBERS) + i) % pending_every == 0
+            travel_data[key] = {'status': 'business', 'daily_cost': 500, 'approved': not pending}
+            if pending:
+                approvals_pending.append(key)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'travel_data': travel_data, 'approvals_pending': approvals_pending,
+                   'team_members': MEMBERS}, f)
+    return travel_data
+
+
+@pytest.fixture
+def api(tmp_path):
+    path = tmp_path / 'travel_store.json'
+    write_store(path)
+    server = create_server(str(path), port=0)
+    threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+
+    def get(url, headers=None):
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('GET', url, headers=headers or {})
+        response = conn.getresponse()
+        body = response.read()
+        conn.close()
+        return response, body
+
+    get.path = path
+    yield get
+    server.shutdown()
+    server.server_close()
+
+
+def cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode('utf-8')).decode('ascii')
+
+
+def test_pagination_walks_every_record_once(api):
+    seen = []
+    url = '/api/travel?limit=40'
+    while url:
+        response, body = api(url)
+        assert response.status == 200
+        page = json.loads(body)
+        seen += [(r['date'], r['name']) for r in page['items']]
+        url = f"/api/travel?limit=40&cursor={page['next_cursor']}" if page['next_cursor'] else None
+
+    assert len(seen) == 250
+    assert seen == sorted(set(seen))
+
+
+def test_pagination_inside_a_date_range(api):
+    response, body = api('/api/travel?start=2026-01-05&end=2026-01-06&limit=15')
+    first = json.loads(body)
+    response, body = api(f"/api/travel?start=2026-01-05&end=2026-01-06&limit=15&cursor={first['next_cursor']}")
+    second = json.loads(body)
+
+    dates = [r['date'] for r in first['items'] + second['items']]
+    assert len(dates) == 20
+    assert set(dates) == {'2026-01-05', '2026-01-06'}
+    assert second['next_cursor'] is None
+
+
+def test_etag_gives_304_until_the_store_changes(api):
+    response, _ = api('/api/approvals/pending')
+    etag = response.getheader('ETag')
+    assert etag.startswith('W/"')
+
+    response, body = api('/api/approvals/pending', {'If-None-Match': etag})
+    assert response.status == 304
+    assert body == b''
+
+    write_store(api.path, days=20)
+    response, body = api('/api/approvals/pending', {'If-None-Match': etag})
+    assert response.status == 200
+    assert response.getheader('ETag') != etag
+    assert json.loads(body)['items']
+
+
+def test_gzip_only_above_the_size_threshold(api):
+    response, plain = api('/api/travel?limit=200')
+    assert response.getheader('Content-Encoding') is None
+
+    response, body = api('/api/travel?limit=200', {'Accept-Encoding': 'gzip'})
+    assert response.getheader('Content-Encoding') == 'gzip'
+    assert gzip.decompress(body) == plain
+
+    # A single stats object is under the threshold and goes out as-is
+    response, _ = api('/api/stats/weekly?week=2026-01-05', {'Accept-Encoding': 'gzip'})
+    assert response.status == 200
+    assert response.getheader('Content-Encoding') is None
+
+
+@pytest.mark.parametrize('url', [
+    f"/api/travel?cursor={cursor([1, 2])}",
+    f"/api/travel?cursor={cursor(['2026-01-05'])}",
+    f"/api/travel?cursor={cursor({'date': '2026-01-05'})}",
+    f"/api/members?cursor={cursor(['Member 01', 'x'])}",
+    "/api/travel?cursor=not-base64!",
+    "/api/travel?limit=0",
+    f"/api/travel?limit={MAX_LIMIT + 1}",
+    "/api/travel?limit=ten",
+    "/api/travel?start=2026-13-01",
+])
+def test_bad_parameters_are_400(api, url):
+    response, body = api(url)
+    assert response.status == 400
+    assert 'error' in json.loads(body)
@@ -0,0 +1,59 @@
+"""decide_requests() against a plain loop over the same rules."""
+import random
+
+import numpy as np
+
+from approval_policy import decide_requests
+
+
+def decide_with_loop(member_idx, dates, costs, caps, blackout, monthly_budget, monthly_spend):
+    """Reference: walk the requests in date order and spend each month's budget"""
+    approve = [False] * len(dates)
+    reject = [str(d) in {str(b) for b in blackout} for d in dates]
+    used = {}
+    # sorted() is stable, like np.lexsort, so same-day requests keep their input order
+    for i in sorted(range(len(dates)), key=lambda i: dates[i]):
+        if reject[i] or costs[i] > caps[member_idx[i]]:
+            continue
+        month = str(dates[i])[:7]
+        used[month] = used.get(month, 0) + costs[i]
+        approve[i] = monthly_spend.get(month, 0) + used[month] <= monthly_budget
+    return approve, reject
+
+
+def random_requests(rng, count):
+    caps = np.array([rng.choice([-1.0, 400.0, 600.0, 1000.0]) for _ in range(5)] + [-1.0])
+    member_idx = np.array([rng.randrange(-1, 5) for _ in range(count)])
+    start = np.datetime64('2025-11-15')
+    dates = np.array([start + rng.randrange(120) for _ in range(count)], dtype='datetime64[D]')
+    costs = np.array([rng.choice([300, 500, 600, 800, 1200]) for _ in range(count)], dtype=float)
+    blackout = np.array(sorted({str(start + rng.randrange(120)) for _ in range(4)}), dtype='datetime64[D]')
+    monthly_spend = {'2025-12': 2500, '2026-01': rng.choice([0, 4000]), '2026-02': 6000}
+    return member_idx, dates, costs, caps, blackout, monthly_spend
+
+
+def test_matches_plain_loop():
+    rng = random.Random(0)
+    for _ in range(200):
+        member_idx, dates, costs, caps, blackout, monthly_spend = random_requests(rng, rng.randrange(1, 60))
+        monthly_budget = rng.choice([3000, 6000, 12500])
+
+        approve, reject = decide_requests(member_idx, dates, costs, caps, blackout, monthly_budget, monthly_spend)
+        expected = decide_with_loop(member_idx, dates, costs, caps, blackout, monthly_budget, monthly_spend)
+
+        assert approve.tolist() == expected[0]
+        assert reject.tolist() == expected[1]
+
+
+def test_budget_runs_out_in_date_order():
+    caps = np.array([1000.0, -1.0])
+    member_idx = np.array([0, 0, 0, 0])
+    dates = np.array(['2026-03-20', '2026-03-02', '2026-03-10', '2026-04-01'], dtype='datetime64[D]')
+    costs = np.array([500, 500, 500, 500], dtype=float)
+
+    approve, reject = decide_requests(member_idx, dates, costs, caps, np.array([], dtype='datetime64[D]'),
+                                      1500, {'2026-03': 500})
+
+    # March has 1000 left: the two earliest March requests fit, the 20th does not; April is fresh
+    assert approve.tolist() == [False, True, True, True]
+    assert not reject.any()